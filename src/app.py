@@ -2,11 +2,17 @@ import streamlit as st
 from src.rag import RAG
 from src.config import RAGConfig
 import time
+from itertools import chain
+
+@st.cache_resource
+def _get_rag() -> RAG:
+    """Build the RAG system once and reuse it across reruns"""
+    return RAG()
 
 def initialize_session_state():
     """Initialize session state variables"""
     if 'rag' not in st.session_state:
-        st.session_state.rag = RAG()
+        st.session_state.rag = _get_rag()
     if 'processed_urls' not in st.session_state:
         st.session_state.processed_urls = set()
     if 'chat_history' not in st.session_state:
@@ -82,10 +88,12 @@ def main():
         
         # Generate and display assistant response
         with st.chat_message("assistant"):
+            # Show the spinner only until the first chunk arrives (retrieval + time to first token)
             with st.spinner("Thinking..."):
-                response = st.session_state.rag.generate_answer(prompt)
-                st.markdown(response)
-                st.session_state.chat_history.append({"role": "assistant", "content": response})
+                stream = st.session_state.rag.stream_answer(prompt)
+                first_chunk = next(stream, "")
+            response = st.write_stream(chain([first_chunk], stream))
+            st.session_state.chat_history.append({"role": "assistant", "content": response})
     
     # Clear chat button
     if st.button("Clear Chat"):
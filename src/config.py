@@ -1,17 +1,21 @@
 from dotenv import load_dotenv
 import os
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 class RAGConfig:
     """Configuration for RAG application"""
-    chunk_size: int = 4000
-    chunk_overlap: int = 400
+    chunk_size: int = 1000  # tokens
+    chunk_overlap: int = 100  # tokens
     embedding_model: str = "text-embedding-3-large"
     chat_model: str = "gpt-4"
+    vector_store_path: Optional[str] = None  # defaults to $VECTOR_STORE_PATH or ./data/vector_store
     
     def __post_init__(self):
         load_dotenv()
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         if not self.openai_api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables") 
\ No newline at end of file
+            raise ValueError("OPENAI_API_KEY not found in environment variables")
+        if self.vector_store_path is None:
+            self.vector_store_path = os.getenv("VECTOR_STORE_PATH", "./data/vector_store") 
\ No newline at end of file
@@ -1,25 +1,11 @@
-from typing import List, Optional
-from langchain_openai import ChatOpenAI
+from typing import Iterator, List, Optional
 from langchain_core.documents import Document
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from openai import OpenAI
 from src.config import RAGConfig
+from functools import lru_cache
 import tiktoken
 
-class LLMClient:
-    """Client for handling LLM-based text generation"""
-    
-    def __init__(self, config: RAGConfig):
-        self.config = config
-        self.llm = ChatOpenAI(
-            model="gpt-4-turbo-preview",
-            openai_api_key=config.openai_api_key,
-            temperature=0.7
-        )
-        
-        # Define the prompt template
-        self.prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a helpful AI assistant that answers questions based on the provided context.
+SYSTEM_TEMPLATE = """You are a helpful AI assistant that answers questions based on the provided context.
             Use the following pieces of context to answer the question at the end.
             If you don't know the answer, just say that you don't know, don't try to make up an answer.
             If the question is not related to the context, politely respond that you are tuned to only answer questions about the context.
@@ -29,14 +15,26 @@ class LLMClient:
             
             Question: {question}
             
-            Answer: """),
-        ])
+            Answer: """
+
+@lru_cache(maxsize=8)
+def _get_encoder(model: str) -> tiktoken.Encoding:
+    """Get the tiktoken encoder for a model, shared across LLMClient instances"""
+    return tiktoken.encoding_for_model(model)
+
+class LLMClient:
+    """Client for handling LLM-based text generation"""
+    
+    def __init__(self, config: RAGConfig):
+        self.config = config
+        self.model = "gpt-4-turbo-preview"
+        self.temperature = 0.7
         
-        # Create the chain
-        self.chain = self.prompt | self.llm | StrOutputParser()
+        # Call the OpenAI API directly to avoid per-request chain overhead
+        self._client = OpenAI(api_key=config.openai_api_key)
         
         # Initialize tokenizer
-        self.tokenizer = tiktoken.encoding_for_model("gpt-4")
+        self.tokenizer = _get_encoder("gpt-4")
         
         # Set maximum context length (GPT-4 Turbo has 128K context window)
         self.max_context_tokens = 10000  # Leave room for prompt and response
@@ -45,35 +43,69 @@ class LLMClient:
         """Count the number of tokens in a text string"""
         return len(self.tokenizer.encode(text))
     
-    def _truncate_context(self, context_docs: List[Document], max_tokens: int) -> str:
-        """Truncate context to fit within token limit while preserving document boundaries
+    def _find_context_cutoff(self, context_docs: List[Document], max_tokens: int) -> int:
+        """Find how many leading documents fit within the token limit
+        
+        Chunks produced by TextProcessor carry their token count in
+        metadata["token_count"], so only documents without it (e.g. chunks
+        stored before counts were recorded) are tokenized. Counting stops as
+        soon as the limit is exceeded, so documents past the cutoff are never
+        tokenized.
         
         Args:
             context_docs: List of Document objects
             max_tokens: Maximum number of tokens allowed
             
         Returns:
-            Truncated context string
+            Number of leading documents that fit
         """
         current_tokens = 0
-        truncated_docs = []
-        
-        for doc in context_docs:
-            doc_tokens = self._count_tokens(doc.page_content)
+        for i, doc in enumerate(context_docs):
+            doc_tokens = doc.metadata.get("token_count")
+            if doc_tokens is None:
+                doc_tokens = len(self.tokenizer.encode_ordinary(doc.page_content))
             
-            # If adding this document would exceed the limit, stop
-            if current_tokens + doc_tokens > max_tokens:
-                break
-                
-            truncated_docs.append(doc)
             current_tokens += doc_tokens
+            if current_tokens > max_tokens:
+                return i
+        
+        return len(context_docs)
+    
+    def _truncate_context(self, context_docs: List[Document], max_tokens: int) -> str:
+        """Truncate context to fit within token limit while preserving document boundaries
+        
+        Args:
+            context_docs: List of Document objects
+            max_tokens: Maximum number of tokens allowed
+            
+        Returns:
+            Truncated context string
+        """
+        cutoff = self._find_context_cutoff(context_docs, max_tokens)
+        truncated_docs = context_docs[:cutoff]
         
         # Combine truncated documents
         context = "\n\n".join(doc.page_content for doc in truncated_docs)
         
-        print(f"Truncated context to {current_tokens} tokens from {len(context_docs)} documents")
+        print(f"Truncated context to {len(truncated_docs)} of {len(context_docs)} documents")
         return context
     
+    def _build_messages(self, 
+                        question: str, 
+                        context_docs: List[Document],
+                        max_context_tokens: Optional[int] = None) -> List[dict]:
+        """Build the chat messages for a question and its context documents"""
+        # Use provided max tokens or default
+        max_tokens = max_context_tokens or self.max_context_tokens
+        
+        # Truncate context to fit within token limit
+        context = self._truncate_context(context_docs, max_tokens)
+        
+        return [{
+            "role": "system",
+            "content": SYSTEM_TEMPLATE.format(context=context, question=question)
+        }]
+    
     def generate_response(self, 
                          question: str, 
                          context_docs: List[Document],
@@ -88,16 +120,35 @@ class LLMClient:
         Returns:
             Generated response as a string
         """
-        # Use provided max tokens or default
-        max_tokens = max_context_tokens or self.max_context_tokens
+        completion = self._client.chat.completions.create(
+            model=self.model,
+            messages=self._build_messages(question, context_docs, max_context_tokens),
+            temperature=self.temperature
+        )
         
-        # Truncate context to fit within token limit
-        context = self._truncate_context(context_docs, max_tokens)
+        return completion.choices[0].message.content or ""
+    
+    def stream_response(self, 
+                        question: str, 
+                        context_docs: List[Document],
+                        max_context_tokens: Optional[int] = None) -> Iterator[str]:
+        """Stream a response using the provided context documents
         
-        # Generate response
-        response = self.chain.invoke({
-            "context": context,
-            "question": question
-        })
+        Args:
+            question: The user's question
+            context_docs: List of relevant documents to use as context
+            max_context_tokens: Optional maximum number of tokens for context
+            
+        Yields:
+            Chunks of the generated response as they arrive
+        """
+        stream = self._client.chat.completions.create(
+            model=self.model,
+            messages=self._build_messages(question, context_docs, max_context_tokens),
+            temperature=self.temperature,
+            stream=True
+        )
         
-        return response
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
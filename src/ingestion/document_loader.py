@@ -1,12 +1,10 @@
-from typing import List, Optional, Set
+from typing import List, Optional, Set, Tuple
+import asyncio
 import bs4
 from bs4 import BeautifulSoup
-import requests
 from urllib.parse import urljoin, urlparse
-from langchain_community.document_loaders import WebBaseLoader
-from langchain_community.document_loaders import FireCrawlLoader
+from firecrawl import FirecrawlApp
 from langchain_core.documents import Document
-from collections import deque
 import re
 import os
 from dotenv import load_dotenv
@@ -27,46 +25,50 @@ class DocumentLoader:
             )
         )
         
-        # Common documentation site patterns
-        self.doc_patterns = [
-            r'/docs/',
-            r'/help/',
-            r'/documentation/',
-            r'/articles/',
-            r'/support/',
-            r'/guide/',
-            r'/manual/'
-        ]
+        # Only build DOM nodes for anchors when extracting links
+        self._anchor_strainer = bs4.SoupStrainer('a', href=True)
+        
+        # Common documentation site patterns, fused into a single regex
+        self._doc_re = re.compile(r'/(?:docs|help|documentation|articles|support|guide|manual)/')
+        
+        # Common non-documentation links to skip
+        self._skip_re = re.compile(r'login|signup|account|profile', re.IGNORECASE)
         
         # Get FireCrawl API key
         self.firecrawl_api_key = os.getenv('FIRECRAWL_API_KEY')
         if not self.firecrawl_api_key:
             raise ValueError("FIRECRAWL_API_KEY not found in environment variables")
+        self.firecrawl = FirecrawlApp(api_key=self.firecrawl_api_key)
     
     def _is_valid_url(self, url: str, base_domain: str) -> bool:
         """Check if URL is valid and belongs to the same domain"""
         try:
             parsed = urlparse(url)
             # Check if it's a documentation URL
-            is_doc_url = any(re.search(pattern, url) for pattern in self.doc_patterns)
+            is_doc_url = bool(self._doc_re.search(url))
             return (parsed.netloc == base_domain and 
                    parsed.scheme in ['http', 'https'] and
                    is_doc_url)
         except:
             return False
             
-    def _extract_links(self, url: str, html_content: str, base_domain: str) -> Set[str]:
-        """Extract valid links from HTML content"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        links = set()
+    def _extract_links(self, 
+                       url: str, 
+                       html_content: str, 
+                       base_domain: str, 
+                       exclude: Optional[Set[str]] = None) -> Set[str]:
+        """Extract valid links from HTML content, skipping any URLs in exclude"""
+        soup = BeautifulSoup(html_content, 'lxml', parse_only=self._anchor_strainer)
         
-        # Look for links in navigation and content areas
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            full_url = urljoin(url, href)
-            
+        # Look for links in navigation and content areas, deduplicated before validation
+        candidates = {urljoin(url, link['href']) for link in soup.find_all('a', href=True)}
+        if exclude:
+            candidates -= exclude
+        
+        links = set()
+        for full_url in candidates:
             # Skip common non-documentation links
-            if any(x in full_url.lower() for x in ['login', 'signup', 'account', 'profile']):
+            if self._skip_re.search(full_url):
                 continue
                 
             if self._is_valid_url(full_url, base_domain):
@@ -74,72 +76,98 @@ class DocumentLoader:
                 
         return links
     
-    def _process_url(self, url: str, depth: int, base_domain: str, max_depth: int) -> List[Document]:
-        """Process a single URL and return its documents"""
-        try:
-            # Set up headers to mimic a browser
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1',
-                'Cache-Control': 'max-age=0'
-            }
-            
-            # Fetch and parse the page with headers
-            response = requests.get(url, timeout=10, headers=headers)
-            response.raise_for_status()
-            
-            # Load content using WebBaseLoader with custom settings
-            '''
-            loader = WebBaseLoader(
-                web_paths=(url,),
-                bs_kwargs=dict(
-                    parse_only=bs4.SoupStrainer(
-                        class_=("post-content", "post-title", "post-header")
-                    )
-                ),
-            )
-            '''
-            loader = FireCrawlLoader(
-                api_key=self.firecrawl_api_key,
-                url = url,
-                mode = "scrape",
-            )
-            page_documents = loader.load()
+    def _scrape_page(self, url: str, include_html: bool) -> Tuple[List[Document], Optional[str]]:
+        """Scrape a single page with FireCrawl (blocking)
+        
+        Args:
+            url: URL of the page to scrape
+            include_html: Whether to also return the page's raw HTML for link extraction
             
-            #print the document content
-            print(f"Document content: {page_documents[0].page_content[:100]}")
+        Returns:
+            Tuple of (page documents, raw HTML or None)
+        """
+        # Ask FireCrawl for the raw HTML alongside the markdown so links can be
+        # extracted without fetching the page a second time
+        formats = ["markdown", "rawHtml"] if include_html else ["markdown"]
+        result = self.firecrawl.scrape_url(url, params={"formats": formats})
+        
+        page_documents = [Document(
+            page_content=result.get("markdown") or "",
+            metadata=result.get("metadata", {})
+        )]
+        return page_documents, result.get("rawHtml")
+    
+    async def _process_url(self, 
+                           semaphore: asyncio.Semaphore,
+                           url: str, 
+                           depth: int, 
+                           base_domain: str, 
+                           max_depth: int,
+                           visited: Set[str]) -> Tuple[List[Document], Set[str]]:
+        """Process a single URL and return its documents and unvisited outgoing links"""
+        async with semaphore:
+            try:
+                # FireCrawl SDK is synchronous, so run it in the default thread pool
+                loop = asyncio.get_running_loop()
+                page_documents, html_content = await loop.run_in_executor(
+                    None, self._scrape_page, url, depth < max_depth
+                )
+                
+                #print the document content
+                print(f"Document content: {page_documents[0].page_content[:100]}")
 
-            # Add metadata to documents
-            for doc in page_documents:
-                doc.metadata.update({
-                    "source": url,
-                    "depth": depth,
-                    "base_domain": base_domain
-                })
-            
-            print(f"Scraped {url} (depth: {depth})")
-            
-            # If not at max depth, extract links for further processing
-            if depth < max_depth:
-                new_links = self._extract_links(url, response.text, base_domain)
-                return page_documents, new_links
+                # Add metadata to documents
+                for doc in page_documents:
+                    doc.metadata.update({
+                        "source": url,
+                        "depth": depth,
+                        "base_domain": base_domain
+                    })
                 
-            return page_documents, set()
+                print(f"Scraped {url} (depth: {depth})")
+                
+                # If not at max depth, extract links for further processing
+                if depth < max_depth and html_content:
+                    new_links = self._extract_links(url, html_content, base_domain, exclude=visited)
+                    return page_documents, new_links
+                    
+                return page_documents, set()
+                
+            except Exception as e:
+                print(f"Error scraping {url}: {str(e)}")
+                return [], set()
+    
+    async def _load_from_web_async(self, urls: List[str], max_depth: int) -> List[Document]:
+        """Breadth-first crawl that processes each depth level concurrently"""
+        frontier = set(urls)
+        visited = set(urls)
+        documents = []
+        base_domain = urlparse(urls[0]).netloc
+        
+        semaphore = asyncio.Semaphore(16)
+        for depth in range(max_depth + 1):
+            if not frontier:
+                break
+            
+            # Fan out all URLs at this depth at once
+            results = await asyncio.gather(*[
+                self._process_url(semaphore, url, depth, base_domain, max_depth, visited)
+                for url in frontier
+            ])
             
-        except Exception as e:
-            print(f"Error scraping {url}: {str(e)}")
-            return [], set()
+            # The next frontier is every newly discovered link, each visited once
+            next_frontier = set()
+            for page_docs, new_links in results:
+                documents.extend(page_docs)
+                next_frontier |= new_links - visited
+            visited |= next_frontier
+            frontier = next_frontier
+        
+        print(f"Scraped {len(documents)} documents from {len(visited)} URLs")
+        return documents
     
     def load_from_web(self, urls: List[str], max_depth: int = 5) -> List[Document]:
-        """Load documents from web URLs sequentially
+        """Load documents from web URLs, crawling each depth level concurrently
         
         Args:
             urls: List of seed URLs to start scraping from
@@ -150,30 +178,8 @@ class DocumentLoader:
         """
         if not urls:
             return []
-            
-        # Initialize variables
-        visited = set(urls)
-        documents = []
-        base_domain = urlparse(urls[0]).netloc
-        url_queue = deque([(url, 0) for url in urls])  # (url, depth)
         
-        # Process URLs sequentially
-        while url_queue:
-            url, depth = url_queue.popleft()
-            
-            # Process the URL
-            page_docs, new_links = self._process_url(url, depth, base_domain, max_depth)
-            documents.extend(page_docs)
-            
-            # Add new unvisited links to queue
-            if depth < max_depth:
-                for link in new_links:
-                    if link not in visited:
-                        visited.add(link)
-                        url_queue.append((link, depth + 1))
-        
-        print(f"Scraped {len(documents)} documents from {len(visited)} URLs")
-        return documents
+        return asyncio.run(self._load_from_web_async(urls, max_depth))
     
     def load_from_files(self, file_paths: List[str]) -> List[Document]:
         """Load documents from local files"""
@@ -3,23 +3,71 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from langchain_openai import OpenAIEmbeddings
 from src.config import RAGConfig
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import tiktoken
+import math
+import os
+
+# Encoding used to measure chunks; matches the GPT-4 tokenizer used by LLMClient
+TOKEN_ENCODING = "cl100k_base"
+
+# Below this many documents, process startup costs more than splitting serially
+PARALLEL_SPLIT_THRESHOLD = 16
+
+# Splitter and encoder for the current worker process, built once by _init_split_worker
+_worker_splitter = None
+_worker_encoder = None
+
+def _build_text_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Build a splitter that measures chunks in tokens"""
+    return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        encoding_name=TOKEN_ENCODING,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        add_start_index=True,
+    )
+
+def _annotate_token_counts(chunks: List[Document], encoder: tiktoken.Encoding) -> List[Document]:
+    """Record each chunk's token count in its metadata so it is not re-tokenized at query time"""
+    for chunk in chunks:
+        chunk.metadata["token_count"] = len(encoder.encode_ordinary(chunk.page_content))
+    return chunks
+
+def _init_split_worker(chunk_size: int, chunk_overlap: int):
+    """Build the text splitter and encoder once per worker process"""
+    global _worker_splitter, _worker_encoder
+    _worker_splitter = _build_text_splitter(chunk_size, chunk_overlap)
+    _worker_encoder = tiktoken.get_encoding(TOKEN_ENCODING)
+
+def _split_document(splitter: RecursiveCharacterTextSplitter,
+                    encoder: tiktoken.Encoding,
+                    document: Document) -> List[Document]:
+    """Split a single document, skipping it if it cannot be processed"""
+    try:
+        return _annotate_token_counts(splitter.split_documents([document]), encoder)
+    except Exception as e:
+        print(f"Error processing document {document.metadata.get('source', 'unknown')}: {str(e)}")
+        return []
+
+def _split_one(document: Document) -> List[Document]:
+    """Split a single document in a worker process"""
+    return _split_document(_worker_splitter, _worker_encoder, document)
 
 class TextProcessor:
     """Class to handle text processing operations"""
     
     def __init__(self, config: RAGConfig):
         self.config = config
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=config.chunk_size,
-            chunk_overlap=config.chunk_overlap,
-            add_start_index=True,
-        )
+        # Measure chunks in tokens so every chunk is at most chunk_size tokens
+        self.text_splitter = _build_text_splitter(config.chunk_size, config.chunk_overlap)
+        self.encoder = tiktoken.get_encoding(TOKEN_ENCODING)
         self.embedding_model = OpenAIEmbeddings(
             model=config.embedding_model,
             openai_api_key=config.openai_api_key
         )
     
-    def split_documents(self, documents: Document) -> List[Document]:
+    def split_documents(self, documents: List[Document]) -> List[Document]:
         """Split documents into chunks while preserving metadata
         
         Args:
@@ -30,11 +78,34 @@ class TextProcessor:
         """
         print(f"\nStarting document splitting:")
         print(f"Input documents: {len(documents)}")
-        print(f"Chunk size: {self.config.chunk_size}")
-        print(f"Chunk overlap: {self.config.chunk_overlap}")
+        print(f"Chunk size: {self.config.chunk_size} tokens")
+        print(f"Chunk overlap: {self.config.chunk_overlap} tokens")
+        
+        chunks = None
+        if len(documents) >= PARALLEL_SPLIT_THRESHOLD:
+            # Documents are independent, so split them across processes. The map hands
+            # out 4 documents per task, so more than ceil(n / 4) workers would sit idle.
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=min(os.cpu_count() or 1, math.ceil(len(documents) / 4)),
+                    initializer=_init_split_worker,
+                    initargs=(self.config.chunk_size, self.config.chunk_overlap),
+                ) as executor:
+                    chunks = [
+                        chunk
+                        for doc_chunks in executor.map(_split_one, documents, chunksize=4)
+                        for chunk in doc_chunks
+                    ]
+            except (BrokenProcessPool, OSError) as e:
+                # Covers both a pool that dies mid-run and one that cannot start workers
+                print(f"Process pool failed, splitting serially: {str(e)}")
         
-        # Use split_documents directly from RecursiveCharacterTextSplitter
-        chunks = self.text_splitter.split_documents(documents)
+        if chunks is None:
+            chunks = [
+                chunk
+                for doc in documents
+                for chunk in _split_document(self.text_splitter, self.encoder, doc)
+            ]
         
         print(f"\nSplit {len(documents)} documents into {len(chunks)} chunks")
         print(f"Average chunk size: {sum(len(chunk.page_content) for chunk in chunks) / len(chunks) if chunks else 0:.2f} characters")
@@ -42,4 +113,4 @@ class TextProcessor:
     
     def get_embeddings(self, texts: List[str]) -> List[List[float]]:
         """Get embeddings for a list of texts"""
-        return self.embedding_model.embed_documents(texts) 
\ No newline at end of file
+        return self.embedding_model.embed_documents(texts)
\ No newline at end of file
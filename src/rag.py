@@ -1,9 +1,10 @@
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
 from langchain_core.documents import Document
 from src.config import RAGConfig
 from src.ingestion.document_loader import DocumentLoader
 from src.processing.text_processor import TextProcessor
 from src.retrieval.vector_store import RAGVectorStore
+from src.retrieval.semantic_cache import SemanticCache
 from src.generation.llm_client import LLMClient
 from concurrent.futures import ThreadPoolExecutor
 import threading
@@ -15,8 +16,15 @@ class RAG:
         self.config = config or RAGConfig()
         self.document_loader = DocumentLoader()
         self.text_processor = TextProcessor(self.config)
-        self.vector_store = RAGVectorStore(self.text_processor.embedding_model)
+        self.vector_store = RAGVectorStore(
+            self.text_processor.embedding_model,
+            storage_path=self.config.vector_store_path
+        )
         self.llm_client = LLMClient(self.config)
+        self.qa_cache = SemanticCache(
+            self.vector_store.client,
+            self.vector_store.embedding_dimension
+        )
         self.documents_lock = threading.Lock()
         
     def _process_document_batch(self, documents: List[Document]) -> List[Document]:
@@ -39,20 +47,16 @@ class RAG:
         # Load documents with recursive scraping
         documents = self.document_loader.load_from_web(urls, max_depth=max_depth)
         
-        # Process documents sequentially
-        all_chunks = []
-        for doc in documents:
-            try:
-                # Split document into chunks
-                chunks = self.text_processor.split_documents([doc])
-                all_chunks.extend(chunks)
-            except Exception as e:
-                print(f"Error processing document: {str(e)}")
-                continue
+        # Split all documents in a single pass
+        all_chunks = self._process_document_batch(documents)
         
-        # Store in vector store
+        # Store in vector store (embedded and upserted in batches)
         document_ids = self.vector_store.add_documents(all_chunks)
         
+        # Cached answers may be outdated now that the corpus changed
+        if document_ids:
+            self.qa_cache.clear()
+        
         return document_ids
     
     def query(self, query_text: str, k: int = 4) -> List[Document]:
@@ -73,10 +77,50 @@ class RAG:
         Returns:
             Generated answer as a string
         """
+        # Return a cached answer if a similar question was already answered
+        # (the embedding is cached, so retrieval below reuses it)
+        question_embedding = self.vector_store.embed_query(question)
+        cached_response = self.qa_cache.lookup(question_embedding, k)
+        if cached_response is not None:
+            return cached_response
+        
         # Retrieve relevant documents
         context_docs = self.query(question, k=k)
         
         # Generate response using LLM
         response = self.llm_client.generate_response(question, context_docs)
         
-        return response 
\ No newline at end of file
+        # Don't cache answers produced without context (e.g. a failed retrieval)
+        if context_docs:
+            self.qa_cache.add(question_embedding, question, k, response)
+        return response 
+    
+    def stream_answer(self, question: str, k: int = 4) -> Iterator[str]:
+        """Stream an answer using retrieved context and LLM
+        
+        Args:
+            question: The user's question
+            k: Number of relevant documents to retrieve
+            
+        Yields:
+            Chunks of the generated answer as they arrive
+        """
+        # Return a cached answer if a similar question was already answered
+        question_embedding = self.vector_store.embed_query(question)
+        cached_response = self.qa_cache.lookup(question_embedding, k)
+        if cached_response is not None:
+            yield cached_response
+            return
+        
+        # Retrieve relevant documents
+        context_docs = self.query(question, k=k)
+        
+        # Stream response from LLM, keeping the full text for the cache
+        chunks = []
+        for chunk in self.llm_client.stream_response(question, context_docs):
+            chunks.append(chunk)
+            yield chunk
+        
+        # Don't cache answers produced without context (e.g. a failed retrieval)
+        if context_docs:
+            self.qa_cache.add(question_embedding, question, k, "".join(chunks))
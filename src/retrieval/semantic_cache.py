@@ -0,0 +1,90 @@
+from typing import List, Optional
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+import uuid
+
+class SemanticCache:
+    """Cache of question/answer pairs looked up by question embedding similarity"""
+    
+    def __init__(self,
+                 client: QdrantClient,
+                 embedding_dimension: int,
+                 collection_name: str = "qa_cache",
+                 similarity_threshold: float = 0.95):
+        """Initialize the semantic cache on an existing Qdrant client
+        
+        Args:
+            client: Qdrant client to store cached answers in
+            embedding_dimension: Dimension of the question embeddings
+            collection_name: Name of the Qdrant collection for the cache
+            similarity_threshold: Minimum cosine similarity for a cache hit
+        """
+        self.client = client
+        self.embedding_dimension = embedding_dimension
+        self.collection_name = collection_name
+        self.similarity_threshold = similarity_threshold
+        
+        # Reuse the persisted cache only if it matches the embedding dimension
+        collections = self.client.get_collections().collections
+        if any(c.name == self.collection_name for c in collections):
+            existing_dimension = self.client.get_collection(self.collection_name).config.params.vectors.size
+            if existing_dimension != self.embedding_dimension:
+                print(f"Deleting existing collection: {self.collection_name} (dimension {existing_dimension})")
+                self.client.delete_collection(self.collection_name)
+                self._create_collection()
+        else:
+            self._create_collection()
+    
+    def _create_collection(self):
+        """Create the cache collection"""
+        self.client.create_collection(
+            collection_name=self.collection_name,
+            vectors_config=VectorParams(size=self.embedding_dimension, distance=Distance.COSINE),
+        )
+        print(f"Created new collection: {self.collection_name} with dimension {self.embedding_dimension}")
+    
+    def lookup(self, embedding: List[float], k: int) -> Optional[str]:
+        """Return the cached answer for the most similar question, if similar enough
+        
+        Args:
+            embedding: Embedding of the incoming question
+            k: Number of retrieved documents the answer must have been built from
+        
+        Returns:
+            Cached answer, or None on a cache miss
+        """
+        try:
+            points = self.client.query_points(
+                collection_name=self.collection_name,
+                query=embedding,
+                query_filter=Filter(must=[FieldCondition(key="k", match=MatchValue(value=k))]),
+                limit=1,
+                with_payload=True,
+            ).points
+        except Exception as e:
+            print(f"Error during cache lookup: {str(e)}")
+            return None
+        
+        if points and points[0].score >= self.similarity_threshold:
+            print(f"Semantic cache hit with score {points[0].score:.3f}")
+            return points[0].payload.get("answer")
+        return None
+    
+    def add(self, embedding: List[float], question: str, k: int, answer: str):
+        """Store an answer for a question embedding and retrieval size k"""
+        try:
+            self.client.upsert(
+                collection_name=self.collection_name,
+                points=[PointStruct(
+                    id=uuid.uuid4().hex,
+                    vector=embedding,
+                    payload={"question": question, "k": k, "answer": answer},
+                )],
+            )
+        except Exception as e:
+            print(f"Error adding answer to cache: {str(e)}")
+    
+    def clear(self):
+        """Drop all cached answers"""
+        self.client.delete_collection(self.collection_name)
+        self._create_collection()
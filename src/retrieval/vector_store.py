@@ -1,10 +1,13 @@
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Set, Union
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_qdrant import QdrantVectorStore
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
-from functools import lru_cache
+from qdrant_client.http.models import (
+    Distance, FieldCondition, Filter, FilterSelector, MatchValue, PayloadSchemaType, VectorParams
+)
+import hashlib
+import numpy as np
 import time
 import os
 from pathlib import Path
@@ -13,46 +16,69 @@ import uuid
 class RAGVectorStore:
     """Class to handle vector storage and retrieval using Qdrant"""
     
-    def __init__(self, embedding_model: Any):
-        """Initialize the RAG vector store with Qdrant backend"""
+    def __init__(self, embedding_model: Any, storage_path: str = "./data/vector_store"):
+        """Initialize the RAG vector store with Qdrant backend
+        
+        Args:
+            embedding_model: Embedding model used for documents and queries
+            storage_path: Directory for the embedded Qdrant storage
+        """
         # Store the embedding model
         self.embedding_model = embedding_model
         
-        # Create a unique storage path for this instance
-        self.storage_path = f"./data/vector_store_{uuid.uuid4().hex[:8]}"
+        # Use a fixed storage path so ingested documents persist across sessions
+        self.storage_path = storage_path
         os.makedirs(self.storage_path, exist_ok=True)
         print(f"Initializing Qdrant with storage at: {self.storage_path}")
         
-        # Initialize Qdrant client
-        self.client = QdrantClient(
-            path=self.storage_path
-        )
+        # Initialize Qdrant client. The embedded client locks its storage folder,
+        # so only one client (one process) can use a given path at a time.
+        try:
+            self.client = QdrantClient(
+                path=self.storage_path
+            )
+        except RuntimeError as e:
+            raise RuntimeError(
+                f"Vector store at {self.storage_path} is already in use by another Qdrant client. "
+                "Stop the other process (e.g. the Streamlit app) or set VECTOR_STORE_PATH "
+                "to a different directory."
+            ) from e
         
         # Get embedding dimension by embedding a test string
         embedding_dimension = len(embedding_model.embed_query("test"))
+        self.embedding_dimension = embedding_dimension
         print(f"Detected embedding dimension: {embedding_dimension}")
         
+        # Reuse the existing collection if it matches the embedding dimension
+        collection_exists = False
         try:
-            # Try to delete existing collection if it exists
             collections = self.client.get_collections().collections
             if any(c.name == "rag_documents" for c in collections):
-                print("Deleting existing collection: rag_documents")
-                self.client.delete_collection("rag_documents")
+                existing_dimension = self.client.get_collection("rag_documents").config.params.vectors.size
+                if existing_dimension == embedding_dimension:
+                    print("Using existing collection: rag_documents")
+                    collection_exists = True
+                else:
+                    print(f"Deleting existing collection: rag_documents (dimension {existing_dimension})")
+                    self.client.delete_collection("rag_documents")
                 
         except Exception as e:
             print(f"Note: {str(e)}")
             
         # Create new collection
-        try:
-            self.client.create_collection(
-                collection_name="rag_documents",
-                vectors_config=VectorParams(size=embedding_dimension, distance=Distance.COSINE),
-            )
-            print(f"Created new collection: rag_documents with dimension {embedding_dimension}")
-        except Exception as e:
-            print(f"Error creating collection: {str(e)}")
-            raise
+        if not collection_exists:
+            try:
+                self.client.create_collection(
+                    collection_name="rag_documents",
+                    vectors_config=VectorParams(size=embedding_dimension, distance=Distance.COSINE),
+                )
+                print(f"Created new collection: rag_documents with dimension {embedding_dimension}")
+            except Exception as e:
+                print(f"Error creating collection: {str(e)}")
+                raise
             
+        self._ensure_payload_indexes()
+        
         # Initialize vector store
         self.vector_store = QdrantVectorStore(
             client=self.client,
@@ -61,36 +87,118 @@ class RAGVectorStore:
         )
         
         self.query_stats = {"total_queries": 0, "avg_response_time": 0}
+        
+        # Query embedding cache, keyed by text digest
+        self.embedding_cache_size = 256
+        self._embedding_cache: Dict[bytes, np.ndarray] = {}
             
+    def _ensure_payload_indexes(self):
+        """Index filterable metadata so filtered searches prune during HNSW traversal
+        
+        Only a Qdrant server builds payload indexes; the embedded client ignores
+        them. Creating an index that already exists is a no-op, so this runs for
+        both new and reused collections.
+        """
+        init_options = getattr(self.client, "init_options", {})
+        if init_options.get("path") is not None or init_options.get("location") == ":memory:":
+            return
+        
+        for field_name, field_schema in [
+            ("metadata.source", PayloadSchemaType.KEYWORD),
+            ("metadata.base_domain", PayloadSchemaType.KEYWORD),
+            ("metadata.depth", PayloadSchemaType.INTEGER),
+        ]:
+            self.client.create_payload_index(
+                collection_name="rag_documents",
+                field_name=field_name,
+                field_schema=field_schema
+            )
+    
     def __del__(self):
         """Cleanup when the object is destroyed"""
         try:
             if hasattr(self, 'client'):
                 self.client.close()
-            # Remove the storage directory
-            if hasattr(self, 'storage_path') and os.path.exists(self.storage_path):
-                import shutil
-                shutil.rmtree(self.storage_path)
         except Exception as e:
             print(f"Error during cleanup: {str(e)}")
     
-    @lru_cache(maxsize=1000)
-    def _get_embedding(self, text: str) -> List[float]:
+    def _get_embedding(self, text: str) -> np.ndarray:
         """Get embedding for text with caching
         
+        Entries are keyed by a blake2b digest of the text and evicted in FIFO
+        order once the cache holds embedding_cache_size entries.
+        
+        Args:
+            text: Text to get embedding for
+            
+        Returns:
+            Embedding as a float16 array
+        """
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        embedding = self._embedding_cache.get(key)
+        if embedding is not None:
+            return embedding
+        
+        # float16 halves memory again over float32 with negligible effect on cosine similarity
+        embedding = np.asarray(self.embedding_model.embed_query(text), dtype=np.float16)
+        if len(self._embedding_cache) >= self.embedding_cache_size:
+            # Dicts keep insertion order, so the first key is the oldest entry
+            self._embedding_cache.pop(next(iter(self._embedding_cache)))
+        self._embedding_cache[key] = embedding
+        return embedding
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Get the (cached) embedding for a query string
+        
         Args:
             text: Text to get embedding for
             
         Returns:
             List of embedding values
         """
-        return self.embedding_model.embed_query(text)
+        return self._get_embedding(text).astype(np.float32).tolist()
+    
+    @staticmethod
+    def _document_ids(documents: List[Document]) -> List[str]:
+        """Derive stable point IDs for a list of chunks
+        
+        IDs are built from each chunk's source URL and its ordinal among that
+        source's chunks, so re-ingesting a page overwrites its points instead of
+        adding copies. Chunks without a source fall back to an ID derived from
+        their content.
+        """
+        ids = []
+        ordinals: Dict[str, int] = {}
+        for doc in documents:
+            source = doc.metadata.get("source")
+            if source is None:
+                ids.append(str(uuid.uuid5(uuid.NAMESPACE_URL, doc.page_content)))
+                continue
+            ordinal = ordinals.get(source, 0)
+            ordinals[source] = ordinal + 1
+            ids.append(str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}#{ordinal}")))
+        return ids
+    
+    def _delete_sources(self, sources: Set[str]):
+        """Delete all stored chunks for the given source URLs"""
+        for source in sources:
+            self.client.delete(
+                collection_name="rag_documents",
+                points_selector=FilterSelector(filter=Filter(must=[
+                    FieldCondition(key="metadata.source", match=MatchValue(value=source))
+                ]))
+            )
     
-    def add_documents(self, documents: List[Document]) -> List[str]:
-        """Add documents to the vector store one by one
+    def add_documents(self, documents: List[Document], batch_size: int = 128) -> List[str]:
+        """Add documents to the vector store in batches
+        
+        Each batch is embedded in one request and written with one Qdrant upsert.
+        Existing chunks from the same sources are deleted first, so a page that
+        is ingested again replaces its old chunks instead of adding to them.
         
         Args:
             documents: List of Document objects to add
+            batch_size: Number of documents embedded and upserted per request
             
         Returns:
             List of document IDs
@@ -98,16 +206,30 @@ class RAGVectorStore:
         document_ids = []
         start_time = time.time()
         
-        for doc in documents:
+        ids = self._document_ids(documents)
+        if len(set(ids)) != len(ids):
+            raise ValueError(f"Duplicate point IDs: {len(ids) - len(set(ids))} of {len(ids)} documents would overwrite each other")
+        
+        # Remove chunks from a previous ingest of these pages, including any tail
+        # chunks that no longer exist because the page got shorter
+        sources = {doc.metadata["source"] for doc in documents if doc.metadata.get("source") is not None}
+        self._delete_sources(sources)
+        
+        for i in range(0, len(documents), batch_size):
+            batch = documents[i:i + batch_size]
             try:
-                # Add document to vector store
-                doc_id = self.vector_store.add_documents([doc])
-                document_ids.extend(doc_id)
+                # Embed and upsert the whole batch at once
+                batch_ids = self.vector_store.add_documents(
+                    batch,
+                    ids=ids[i:i + batch_size],
+                    batch_size=batch_size
+                )
+                document_ids.extend(batch_ids)
                 
-                print(f"Added document from source: {doc.metadata.get('source', 'unknown')}")
+                print(f"Added batch of {len(batch_ids)} documents ({i + len(batch)}/{len(documents)})")
                 
             except Exception as e:
-                print(f"Error adding document: {str(e)}")
+                print(f"Error adding document batch: {str(e)}")
                 continue
         
         processing_time = time.time() - start_time
@@ -138,9 +260,9 @@ class RAGVectorStore:
         try:
             start_time = time.time()
             
-            # Search using the query
-            results = self.vector_store.similarity_search_with_score(
-                query,
+            # Search using the cached query embedding
+            results = self.vector_store.similarity_search_with_score_by_vector(
+                self.embed_query(query),
                 k=k,
                 filter=metadata_filter
             )